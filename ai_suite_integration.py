@@ -31,6 +31,20 @@ class AISuiteManager:
         """Initialize the AI Suite Manager"""
         self.client = ai.Client()
         self.available_models = self._get_available_models()
+        # Flat provider:model set so per-request validation is one hash lookup
+        self._valid_models = frozenset(
+            f"{provider}:{name}"
+            for provider, names in self.available_models.items()
+            for name in names
+        )
+        # Bind provider-specific tool formatters once so per-call formatting
+        # is a dict dispatch instead of a branch chain, and memoize results
+        # since the same tool list is reused across requests
+        self._formatters = {
+            "anthropic": self._format_tools_anthropic,
+            "google": self._format_tools_google
+        }
+        self._format_cache: Dict[Any, tuple] = {}
 
     def _get_available_models(self) -> Dict[str, List[str]]:
         """Get available models for grid operations analysis"""
@@ -51,18 +65,15 @@ class AISuiteManager:
 
     def validate_model(self, model: str) -> bool:
         """Validate grid operations model availability"""
-        if ":" not in model:
-            return False
-        provider, model_name = model.split(":", 1)
-        return provider in self.available_models and model_name in self.available_models[provider]
+        return model in self._valid_models
 
     def optimize_system_prompt(self, prompt: str, model: str) -> str:
         """Optimize prompts for grid operations tasks"""
         if ":" not in model:
             return prompt
 
-        provider, _ = model.split(":", 1)
-        
+        provider, _, _ = model.partition(":")
+
         if provider == "anthropic":
             return prompt + "\n\nInclude detailed technical analysis of grid load patterns and equipment status."
         elif provider == "google":
@@ -72,29 +83,29 @@ class AISuiteManager:
         
         return prompt + "\n\nProvide concise, actionable insights for grid operators."
 
-    def optimize_tool_format(self, tools: List[Dict[str, Any]], model: str) -> List[Dict[str, Any]]:
-        """Format tools for grid operations workflows"""
-        if ":" not in model:
-            return tools
-
-        provider, _ = model.split(":", 1)
+    @staticmethod
+    def _format_tools_anthropic(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Format tools in the Anthropic tool-use shape"""
+        return [{
+            "name": t["name"],
+            "description": t["description"],
+            "input_schema": t["inputSchema"]
+        } for t in tools]
 
-        # Format for grid operation tools
-        if provider == "anthropic":
-            return [{
+    @staticmethod
+    def _format_tools_google(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Format tools as Gemini function declarations"""
+        return [{
+            "function_declarations": [{
                 "name": t["name"],
                 "description": t["description"],
-                "input_schema": t["inputSchema"]
-            } for t in tools]
-        elif provider == "google":
-            return [{
-                "function_declarations": [{
-                    "name": t["name"],
-                    "description": t["description"],
-                    "parameters": t["inputSchema"]
-                }]
-            } for t in tools]
-        
+                "parameters": t["inputSchema"]
+            }]
+        } for t in tools]
+
+    @staticmethod
+    def _format_tools_openai(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Format tools in the OpenAI function-calling shape (default)"""
         return [{
             "type": "function",
             "function": {
@@ -104,6 +115,26 @@ class AISuiteManager:
             }
         } for t in tools]
 
+    def optimize_tool_format(self, tools: List[Dict[str, Any]], model: str) -> List[Dict[str, Any]]:
+        """Format tools for grid operations workflows"""
+        if ":" not in model:
+            return tools
+
+        provider, _, _ = model.partition(":")
+
+        # Keyed by id(tools), so each entry pins the tools list it was built
+        # from: ids are reused after garbage collection, and a hit is only
+        # valid while the keyed object is still the same list
+        cache_key = (provider, id(tools))
+        entry = self._format_cache.get(cache_key)
+        if entry is not None and entry[0] is tools:
+            return entry[1]
+
+        formatter = self._formatters.get(provider, self._format_tools_openai)
+        formatted = formatter(tools)
+        self._format_cache[cache_key] = (tools, formatted)
+        return formatted
+
     def create_chat_completion(self, model: str, messages: List[Dict[str, Any]],
                               tools: Optional[List[Dict[str, Any]]] = None,
                               temperature: float = 0.3) -> Any:
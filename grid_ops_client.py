@@ -11,6 +11,7 @@ import os
 import sys
 import json
 import asyncio
+import hashlib
 import logging
 from datetime import datetime
 from typing import Dict, Any, List, Optional
@@ -24,6 +25,48 @@ from dotenv import load_dotenv
 # Import our MCP Host
 from grid_ops_host import MCPHost
 
+# Optional fast JSON; falls back to stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional fast hashing for result dedup; falls back to blake2b
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+def _json_dumps_indented(obj: Any) -> str:
+    """Serialize with 2-space indentation using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=2)
+
+def _json_loads(data: Any) -> Any:
+    """Deserialize JSON using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _stable_hash(obj: Any) -> int:
+    """Hash an object by its canonical JSON encoding."""
+    if orjson is not None:
+        payload = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS, default=str)
+    else:
+        payload = json.dumps(obj, sort_keys=True, default=str).encode("utf-8")
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(payload)
+    return int.from_bytes(hashlib.blake2b(payload, digest_size=8).digest(), "big")
+
+# Optional semantic-cache dependencies; the cache disables itself if missing
+try:
+    from sentence_transformers import SentenceTransformer
+    import faiss
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -31,6 +74,58 @@ logger.setLevel(logging.INFO)
 # Load environment variables
 load_dotenv()
 
+class SemanticCache:
+    """
+    Embedding-similarity cache for near-duplicate operational queries.
+
+    Operators often paraphrase the same question ("Northeast load last 48h"
+    vs "load in NE over past two days"); an exact-match cache misses these.
+    Queries are embedded once and looked up with cosine similarity, so a
+    near-duplicate query returns the stored answer without an LLM round-trip.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.92,
+                 model_name: str = "all-MiniLM-L6-v2"):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            similarity_threshold: Minimum cosine similarity for a cache hit
+            model_name: The sentence-transformers model used for embeddings
+        """
+        self.enabled = SEMANTIC_CACHE_AVAILABLE
+        self.similarity_threshold = similarity_threshold
+        if not self.enabled:
+            logger.info("Semantic cache disabled (sentence-transformers/faiss not installed)")
+            return
+        self.encoder = SentenceTransformer(model_name)
+        self.index = faiss.IndexFlatIP(self.encoder.get_sentence_embedding_dimension())
+        self.entries: List[Dict[str, Any]] = []
+
+    def lookup(self, query: str) -> Optional[str]:
+        """Return the cached answer for a similar enough query, or None."""
+        if not self.enabled or self.index.ntotal == 0:
+            return None
+        embedding = self.encoder.encode([query], normalize_embeddings=True)
+        distances, indices = self.index.search(embedding, 1)
+        if distances[0][0] >= self.similarity_threshold:
+            entry = self.entries[indices[0][0]]
+            logger.info(f"Semantic cache hit (similarity={distances[0][0]:.3f}) for: {entry['query']}")
+            return entry["answer"]
+        return None
+
+    def store(self, query: str, answer: str, context_snapshot: Dict[str, Any]) -> None:
+        """Store a query/answer pair with a snapshot of the operational context."""
+        if not self.enabled:
+            return
+        embedding = self.encoder.encode([query], normalize_embeddings=True)
+        self.index.add(embedding)
+        self.entries.append({
+            "query": query,
+            "answer": answer,
+            "context": context_snapshot
+        })
+
 class GridOperationsClient:
     """
     MCP Client for grid operations applications.
@@ -52,6 +147,10 @@ class GridOperationsClient:
         self.session: Optional[ClientSession] = None
         self.exit_stack = AsyncExitStack()
         self.host = MCPHost(model=model)
+        self.semantic_cache = SemanticCache()
+        # True when the last answer was already printed by the host's
+        # streaming path, so the interactive loop must not echo it again
+        self._response_streamed = False
 
         # Initialize operational context
         self.operational_context = {
@@ -60,6 +159,19 @@ class GridOperationsClient:
             "regions": [],
             "analyses": []
         }
+        # Serialized context is memoized until a tool call mutates the
+        # context, so follow-up queries skip the re-serialization entirely
+        self._ctx_version = 0
+        self._ctx_cache = (-1, "")
+        self._analysis_hashes: set = set()
+        # Set sidecars for O(1) membership checks as the context lists grow
+        self._datasets_seen: set = set()
+        self._equipment_seen: set = set()
+        self._regions_seen: set = set()
+        # Name interner: the context lists store small integer IDs and the
+        # names are materialized only when rendering the context
+        self._interner: Dict[str, int] = {}
+        self._interned_names: List[str] = []
 
     async def connect_to_server(self, server_script_path: str):
         """
@@ -90,77 +202,137 @@ class GridOperationsClient:
         response = await self.session.list_tools()
         self.tools = response.tools
 
+        # The tool set is fixed for the life of the connection, so format it
+        # once instead of rebuilding the dicts on every query
+        self._formatted_tools = tuple(
+            {
+                "name": tool.name,
+                "description": tool.description,
+                "inputSchema": tool.inputSchema
+            }
+            for tool in self.tools
+        )
+
         logger.info(f"Connected to grid operations server with {len(self.tools)} tools")
         print(f"\nConnected to grid operations server with {len(self.tools)} tools")
         print(f"Using model: {self.host.model}")
 
-    async def process_operational_query(self, query: str) -> str:
+    async def process_operational_query(self, query: str, record_history: bool = True,
+                                        quiet: bool = False) -> str:
         """
         Process a grid operations query.
 
         Args:
             query: The user's operational query
+            record_history: Append this turn to the host's conversation
+                history; batch mode passes False so concurrent queries
+                don't contaminate each other's prompts
+            quiet: Suppress streaming and per-tool progress prints; batch
+                mode passes True so concurrent queries don't interleave
+                their output on stdout
 
         Returns:
             The response to the query
         """
-        # Format tools for the host
-        formatted_tools = []
-        for tool in self.tools:
-            formatted_tool = {
-                "name": tool.name,
-                "description": tool.description,
-                "inputSchema": tool.inputSchema
-            }
-            formatted_tools.append(formatted_tool)
-
-        # Create context string from operational context
-        context_str = f"Current operational context: {json.dumps(self.operational_context, indent=2)}"
-
-        # Process the query using the host
-        result = await self.host.process_query(query, formatted_tools, context_str)
+        # Return a cached answer for near-duplicate queries; nothing was
+        # streamed, so the caller still needs to print it
+        self._response_streamed = False
+        cached_answer = self.semantic_cache.lookup(query)
+        if cached_answer is not None:
+            return cached_answer
+
+        # Tools were formatted once at connect time
+        formatted_tools = self._formatted_tools
+
+        # Create context string from operational context, reusing the cached
+        # serialization when nothing has changed since the last query
+        if self._ctx_cache[0] == self._ctx_version:
+            context_str = self._ctx_cache[1]
+        else:
+            context_str = f"Current operational context: {_json_dumps_indented(self._context_view())}"
+            self._ctx_cache = (self._ctx_version, context_str)
+
+        # Process the query using the host; quiet mode forces streaming off
+        # regardless of the host's default
+        stream = False if quiet else None
+        result = await self.host.process_query(query, formatted_tools, context_str,
+                                               record_history=record_history,
+                                               stream=stream)
 
         # If no tool calls, return the response
         if not result["tool_calls"]:
+            self._response_streamed = self.host.last_response_streamed
+            self.semantic_cache.store(query, result["response"], self._context_view())
             return result["response"]
 
-        # Execute tool calls
+        # Execute tool calls concurrently; they are independent and IO-bound,
+        # so N calls complete in ~max(latency) instead of sum(latency)
+        semaphore = asyncio.Semaphore(5)
+
+        async def run_tool(tool_call):
+            async with semaphore:
+                tool_name = tool_call["name"]
+                tool_args = tool_call["arguments"]
+                logger.info(f"Executing tool: {tool_name}")
+                if not quiet:
+                    print(f"\nExecuting tool: {tool_name}")
+                    print(f"Arguments: {json.dumps(tool_args, indent=2)}")
+                return await self.session.call_tool(tool_name, tool_args)
+
+        outcomes = await asyncio.gather(
+            *(run_tool(tool_call) for tool_call in result["tool_calls"]),
+            return_exceptions=True
+        )
+
+        # Collect results in tool-call order
         tool_results = []
-        for tool_call in result["tool_calls"]:
+        for tool_call, outcome in zip(result["tool_calls"], outcomes):
             tool_name = tool_call["name"]
-            tool_args = tool_call["arguments"]
-
-            logger.info(f"Executing tool: {tool_name}")
-            print(f"\nExecuting tool: {tool_name}")
-            print(f"Arguments: {json.dumps(tool_args, indent=2)}")
-
-            # Call the tool on the server
-            try:
-                tool_result = await self.session.call_tool(tool_name, tool_args)
-            except Exception as e:
-                logger.error(f"Tool execution failed: {str(e)}")
+            if isinstance(outcome, Exception):
+                logger.error(f"Tool execution failed: {str(outcome)}")
                 continue
 
             # Update operational context based on tool and result
-            self._update_operational_context(tool_name, tool_args, tool_result.content)
+            self._update_operational_context(tool_name, tool_call["arguments"], outcome.content)
 
             # Add to results
             tool_results.append({
                 "id": tool_call["id"],
-                "result": tool_result.content
+                "result": outcome.content
             })
 
             logger.info(f"Tool result received for {tool_name}")
-            print(f"Tool result received: {type(tool_result.content)}")
+            if not quiet:
+                print(f"Tool result received: {type(outcome.content)}")
 
         # Process tool results to get final answer
         final_answer = await self.host.process_tool_results(
             result["messages"],
             result["llm_response"],
-            tool_results
+            tool_results,
+            record_history=record_history,
+            stream=stream
         )
+        self._response_streamed = self.host.last_response_streamed
+        self.semantic_cache.store(query, final_answer, self._context_view())
         return final_answer
 
+    def _intern(self, name: str) -> int:
+        """Return the integer ID for a name, assigning one on first use."""
+        interned_id = self._interner.get(name)
+        if interned_id is None:
+            interned_id = len(self._interned_names)
+            self._interner[name] = interned_id
+            self._interned_names.append(name)
+        return interned_id
+
+    def _context_view(self) -> Dict[str, Any]:
+        """Materialize the operational context with names in place of IDs."""
+        view = dict(self.operational_context)
+        for key in ("datasets", "equipment", "regions"):
+            view[key] = [self._interned_names[i] for i in self.operational_context[key]]
+        return view
+
     def _update_operational_context(self, tool_name: str, tool_args: Dict[str, Any], result: Any):
         """
         Update the operational context based on tool calls and results.
@@ -174,8 +346,8 @@ class GridOperationsClient:
         result_dict = {}
         if isinstance(result, str):
             try:
-                result_dict = json.loads(result)
-            except json.JSONDecodeError as e:
+                result_dict = _json_loads(result)
+            except ValueError as e:
                 result_dict = {"raw_result": result}
                 logger.error(f"Failed to parse tool result: {str(e)}")
         elif isinstance(result, dict):
@@ -185,22 +357,32 @@ class GridOperationsClient:
         if tool_name == "get_grid_topology":
             if "region" in tool_args:
                 region = tool_args["region"]
-                if region not in self.operational_context["regions"]:
-                    self.operational_context["regions"].append(region)
+                if region not in self._regions_seen:
+                    self._regions_seen.add(region)
+                    self.operational_context["regions"].append(self._intern(region))
 
         elif tool_name == "get_grid_load_data":
             if "dataset_id" in tool_args:
                 dataset_id = tool_args["dataset_id"]
-                if dataset_id not in self.operational_context["datasets"]:
-                    self.operational_context["datasets"].append(dataset_id)
+                if dataset_id not in self._datasets_seen:
+                    self._datasets_seen.add(dataset_id)
+                    self.operational_context["datasets"].append(self._intern(dataset_id))
 
         elif tool_name == "get_equipment_status":
             if "equipment_id" in tool_args:
                 equipment_id = tool_args["equipment_id"]
-                if equipment_id not in self.operational_context["equipment"]:
-                    self.operational_context["equipment"].append(equipment_id)
+                if equipment_id not in self._equipment_seen:
+                    self._equipment_seen.add(equipment_id)
+                    self.operational_context["equipment"].append(self._intern(equipment_id))
 
         elif tool_name in ["analyze_load_pattern", "predict_outage_risk", "generate_grid_visualization"]:
+            # Skip identical analyses so repeated queries don't bloat the
+            # context (and its per-turn serialization)
+            analysis_hash = _stable_hash({"tool": tool_name, "args": tool_args, "result": result_dict})
+            if analysis_hash in self._analysis_hashes:
+                return
+            self._analysis_hashes.add(analysis_hash)
+
             # Add analysis to context
             self.operational_context["analyses"].append({
                 "tool": tool_name,
@@ -209,6 +391,64 @@ class GridOperationsClient:
                 "result": result_dict
             })
 
+        self._ctx_version += 1
+
+    async def process_batch(self, queries: List[str], concurrency: int = 10) -> List[str]:
+        """
+        Process a batch of operational queries concurrently.
+
+        Batch queries are independent, so each runs against a stable
+        snapshot of the conversation history: with record_history disabled
+        nothing mutates the shared history mid-batch, and no query sees
+        another's half-finished turn. Quiet mode keeps concurrent queries
+        from interleaving streamed tokens and tool prints on stdout.
+
+        Args:
+            queries: The queries to process
+            concurrency: Maximum number of queries in flight at once
+
+        Returns:
+            Responses in the same order as the input queries
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def process_one(query: str) -> str:
+            async with semaphore:
+                return await self.process_operational_query(query, record_history=False,
+                                                            quiet=True)
+
+        return await asyncio.gather(*(process_one(query) for query in queries))
+
+    async def run_batch_file(self, batch_path: str, results_path: str = "results.jsonl",
+                             concurrency: int = 10):
+        """
+        Replay queries from a file and checkpoint results as they complete.
+
+        Args:
+            batch_path: Path to a file with one query per line
+            results_path: Path of the JSONL results file (appended per result)
+            concurrency: Maximum number of queries in flight at once
+        """
+        with open(batch_path) as f:
+            queries = [line.strip() for line in f if line.strip()]
+        print(f"\nProcessing batch of {len(queries)} queries from {batch_path}")
+
+        semaphore = asyncio.Semaphore(concurrency)
+        write_lock = asyncio.Lock()
+
+        async def process_one(query: str):
+            async with semaphore:
+                response = await self.process_operational_query(query, record_history=False,
+                                                                quiet=True)
+            # Checkpoint each result as soon as it completes so a crash
+            # doesn't lose finished work
+            async with write_lock:
+                with open(results_path, "a") as out:
+                    out.write(json.dumps({"query": query, "response": response}) + "\n")
+
+        await asyncio.gather(*(process_one(query) for query in queries))
+        print(f"Batch complete; results written to {results_path}")
+
     async def operational_loop(self):
         """Run an interactive operational loop"""
         print("\nGrid Operations MCP Client Started!")
@@ -225,7 +465,7 @@ class GridOperationsClient:
 
                 if query.lower() == 'context':
                     print("\nCurrent Operational Context:")
-                    print(json.dumps(self.operational_context, indent=2))
+                    print(json.dumps(self._context_view(), indent=2))
                     continue
 
                 if query.startswith('model:'):
@@ -236,7 +476,10 @@ class GridOperationsClient:
 
                 print("\nProcessing your query...")
                 response = await self.process_operational_query(query)
-                print("\n" + response)
+                # Streamed answers were already printed chunk by chunk;
+                # cache hits produced no output and still need the echo
+                if not self._response_streamed:
+                    print("\n" + response)
 
             except Exception as e:
                 logger.error(f"Error processing query: {str(e)}")
@@ -246,18 +489,34 @@ class GridOperationsClient:
 
     async def cleanup(self):
         """Clean up resources"""
+        await self.host.aclose()
         await self.exit_stack.aclose()
 
 async def main():
-    if len(sys.argv) < 2:
-        print("Usage: python grid_client.py <path_to_server_script> [initial_model]")
+    args = sys.argv[1:]
+
+    # Optional headless batch mode: replay queries from a file
+    batch_file = None
+    if "--batch-file" in args:
+        idx = args.index("--batch-file")
+        if idx + 1 >= len(args):
+            print("Usage: python grid_client.py <path_to_server_script> [initial_model] [--batch-file queries.jsonl]")
+            sys.exit(1)
+        batch_file = args[idx + 1]
+        del args[idx:idx + 2]
+
+    if len(args) < 1:
+        print("Usage: python grid_client.py <path_to_server_script> [initial_model] [--batch-file queries.jsonl]")
         sys.exit(1)
-    initial_model = sys.argv[2] if len(sys.argv) > 2 else "openai:gpt-4o"
+    initial_model = args[1] if len(args) > 1 else "openai:gpt-4o"
     client = GridOperationsClient(model=initial_model)
-    
+
     try:
-        await client.connect_to_server(sys.argv[1])
-        await client.operational_loop()
+        await client.connect_to_server(args[0])
+        if batch_file:
+            await client.run_batch_file(batch_file)
+        else:
+            await client.operational_loop()
     except Exception as e:
         logger.error(f"Fatal error: {str(e)}")
         print(f"Fatal error: {str(e)}")
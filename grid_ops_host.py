@@ -9,14 +9,104 @@ communication between the LLM and external resources.
 """
 import os
 import json
+import time
+import textwrap
+import hashlib
 import asyncio
+from types import SimpleNamespace
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 import aisuite as ai
 
+# Optional pooled HTTP client; aisuite providers fall back to their own
+# per-client connections if httpx is unavailable
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Optional accurate token counting; falls back to a chars/4 estimate
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Optional fast JSON; falls back to stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_dumps(obj: Any) -> str:
+    """Serialize a machine-readable payload using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode()
+    return json.dumps(obj, default=str)
+
+def _json_loads(data: Any) -> Any:
+    """Deserialize JSON using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # Load environment variables
 load_dotenv()
 
+class LLMCache:
+    """
+    In-process cache for LLM responses with LRU eviction and TTL expiry.
+
+    Identical prompts (same model, messages, and tools) re-hit the provider
+    on every call otherwise, paying a full network round-trip and token cost
+    for a response we already have.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl_seconds: int = 3600):
+        """
+        Initialize the LLM cache.
+
+        Args:
+            maxsize: Maximum number of cached responses (LRU eviction beyond this)
+            ttl_seconds: Time-to-live for cached entries in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]],
+                 tools: Optional[List[Dict[str, Any]]] = None,
+                 temperature: float = 0.0) -> str:
+        """Build a deterministic cache key from the request payload."""
+        request = {"model": model, "messages": messages, "tools": tools, "temperature": temperature}
+        if orjson is not None:
+            payload = orjson.dumps(request, option=orjson.OPT_SORT_KEYS, default=str)
+        else:
+            payload = json.dumps(request, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on miss/expiry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value under key, evicting the least recently used entry if full."""
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
 class MCPHost:
     """
     MCP Host for managing LLM interactions with the MCP server (Grid Operations Use Case).
@@ -28,16 +118,41 @@ class MCPHost:
     4. Providing tool results back to the LLM
     """
 
-    def __init__(self, model: str = "openai:gpt-4o"):
+    def __init__(self, model: str = "openai:gpt-4o", stream: bool = True):
         """
         Initialize the MCP Host.
 
         Args:
             model: The LLM model to use (provider:model format)
+            stream: Stream completion chunks as they arrive instead of
+                waiting for the full response
         """
-        self.ai_client = ai.Client()
+        # Share one pooled HTTP client across all completion calls so repeated
+        # requests reuse keep-alive connections instead of paying a TCP/TLS
+        # handshake each time
+        self._http_client = None
+        provider_configs = {}
+        if httpx is not None:
+            self._http_client = httpx.Client(
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=20),
+                timeout=60.0
+            )
+            provider_configs = {"openai": {"http_client": self._http_client}}
+        self.ai_client = ai.Client(provider_configs=provider_configs)
+        # aisuite completion calls are synchronous; run them in a thread pool
+        # so they don't block the event loop
+        self._executor = ThreadPoolExecutor(max_workers=8)
         self.model = model
-        self.conversation_history = []
+        self.stream = stream
+        # True when the most recent response was already printed by the
+        # streaming path; cache hits produce no output and leave this False
+        self.last_response_streamed = False
+        self.llm_cache = LLMCache()
+        self._tool_cache: Dict[Any, tuple] = {}
+        # Bound the history so long sessions don't grow the per-request
+        # payload (and prompt-token cost) without limit
+        self.conversation_history = deque(maxlen=32)
+        self.max_history_tokens = 4000
         self.system_message = """
         You are a Grid Operations Assistant, an AI specialized in power grid management,
         outage response, maintenance scheduling, and operational analytics. You have access
@@ -54,6 +169,11 @@ class MCPHost:
         Your goal is to help grid operators and engineers maintain reliability, optimize performance,
         and restore power efficiently through rigorous operational analysis.
         """
+        # Dedent once so the system prompt bytes are identical on every call;
+        # providers with prompt caching only reuse the KV cache when the
+        # prefix matches exactly
+        self.system_message = textwrap.dedent(self.system_message).strip()
+        self._static_prefix = [{"role": "system", "content": self.system_message}]
 
     def format_tools_for_llm(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -65,6 +185,16 @@ class MCPHost:
         Returns:
             Formatted tools for the LLM
         """
+        # The same tool list is passed on every turn; reuse the formatted
+        # version until the tool list or model changes. Entries pin the
+        # tools object they were built from: ids are reused after garbage
+        # collection, so a hit is only valid while the keyed object is
+        # still the same list
+        cache_key = (self.model, id(tools))
+        entry = self._tool_cache.get(cache_key)
+        if entry is not None and entry[0] is tools:
+            return entry[1]
+
         formatted_tools = []
         for tool in tools:
             formatted_tool = {
@@ -76,8 +206,104 @@ class MCPHost:
                 }
             }
             formatted_tools.append(formatted_tool)
+        self._tool_cache[cache_key] = (tools, formatted_tools)
         return formatted_tools
 
+    def _stream_completion(self, **kwargs) -> Any:
+        """
+        Issue a streaming completion, printing content chunks as they arrive.
+
+        Aggregates content and tool-call deltas into a response shaped like a
+        non-streaming completion, so callers see the same contract while the
+        user sees output at time-to-first-token instead of after the full
+        generation.
+        """
+        stream = self.ai_client.chat.completions.create(stream=True, **kwargs)
+        content_parts = []
+        tool_calls_by_index = {}
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if getattr(delta, "content", None):
+                print(delta.content, end="", flush=True)
+                content_parts.append(delta.content)
+            for tc_delta in getattr(delta, "tool_calls", None) or []:
+                acc = tool_calls_by_index.setdefault(tc_delta.index, {
+                    "id": None, "name": None, "arguments": []
+                })
+                if tc_delta.id:
+                    acc["id"] = tc_delta.id
+                if tc_delta.function.name:
+                    acc["name"] = tc_delta.function.name
+                if tc_delta.function.arguments:
+                    acc["arguments"].append(tc_delta.function.arguments)
+        if content_parts:
+            print(flush=True)
+
+        tool_calls = [
+            SimpleNamespace(
+                id=acc["id"],
+                function=SimpleNamespace(
+                    name=acc["name"],
+                    arguments="".join(acc["arguments"])
+                )
+            )
+            for _, acc in sorted(tool_calls_by_index.items())
+        ] or None
+        message = SimpleNamespace(
+            content="".join(content_parts) or None,
+            tool_calls=tool_calls
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _chat_async(self, stream: Optional[bool] = None, **kwargs) -> Any:
+        """
+        Run the synchronous aisuite completion call in the thread pool.
+
+        Keeps the event loop free so concurrent queries and background tasks
+        can progress while a completion is in flight. Streams the response
+        when streaming is enabled.
+
+        Args:
+            stream: Per-call override of the host's streaming setting; None
+                uses self.stream
+        """
+        loop = asyncio.get_running_loop()
+        if self.stream if stream is None else stream:
+            call = partial(self._stream_completion, **kwargs)
+        else:
+            call = partial(self.ai_client.chat.completions.create, **kwargs)
+        return await loop.run_in_executor(self._executor, call)
+
+    def _token_count(self, message: Dict[str, Any]) -> int:
+        """Estimate the token count of a single message."""
+        text = str(message.get("content") or "")
+        if tiktoken is not None:
+            try:
+                encoding = tiktoken.encoding_for_model(self.model.split(":", 1)[-1])
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+            return len(encoding.encode(text))
+        return len(text) // 4
+
+    def _trimmed_history(self) -> List[Dict[str, Any]]:
+        """
+        Return the most recent history messages within the token budget.
+
+        Walks newest to oldest, keeping messages until max_history_tokens is
+        reached, so the prompt stays bounded as the session grows.
+        """
+        kept = []
+        budget = self.max_history_tokens
+        for message in reversed(self.conversation_history):
+            budget -= self._token_count(message)
+            if budget < 0:
+                break
+            kept.append(message)
+        kept.reverse()
+        return kept
+
     def create_messages(self, query: str, context: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Create messages for the LLM, including conversation history.
@@ -89,17 +315,19 @@ class MCPHost:
         Returns:
             List of messages for the LLM
         """
-        messages = [
-            {"role": "system", "content": self.system_message}
-        ]
-        messages.extend(self.conversation_history)
+        # Start from the frozen system prefix so the prompt prefix stays
+        # byte-identical across turns and only the tail mutates
+        messages = list(self._static_prefix)
+        messages.extend(self._trimmed_history())
         if context:
             messages.append({"role": "system", "content": f"Additional context: {context}"})
         messages.append({"role": "user", "content": query})
         return messages
 
     async def process_query(self, query: str, tools: List[Dict[str, Any]],
-                           context: Optional[str] = None) -> Dict[str, Any]:
+                           context: Optional[str] = None,
+                           record_history: bool = True,
+                           stream: Optional[bool] = None) -> Dict[str, Any]:
         """
         Process a user query using the LLM and available tools.
 
@@ -107,29 +335,43 @@ class MCPHost:
             query: The user's query
             tools: List of available tools from the MCP server
             context: Optional additional context
+            record_history: Append this turn to the shared conversation
+                history; pass False for concurrent batch queries, which
+                must not see each other's half-finished turns
+            stream: Per-call override of the host's streaming setting;
+                concurrent batch queries pass False so their token chunks
+                don't interleave on stdout
 
         Returns:
             Processing results including LLM response and tool calls
         """
+        use_stream = self.stream if stream is None else stream
         formatted_tools = self.format_tools_for_llm(tools)
         messages = self.create_messages(query, context)
 
-        response = self.ai_client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            tools=formatted_tools,
-            temperature=0.3,  # Lower temperature for operational tasks
-            max_tokens=2000
-        )
-        llm_response = response.choices[0].message
+        cache_key = LLMCache.make_key(self.model, messages, formatted_tools, temperature=0.3)
+        llm_response = self.llm_cache.get(cache_key)
+        self.last_response_streamed = llm_response is None and use_stream
+        if llm_response is None:
+            response = await self._chat_async(
+                stream=use_stream,
+                model=self.model,
+                messages=messages,
+                tools=formatted_tools,
+                temperature=0.3,  # Lower temperature for operational tasks
+                max_tokens=2000
+            )
+            llm_response = response.choices[0].message
+            self.llm_cache.set(cache_key, llm_response)
 
         # Update conversation history
-        self.conversation_history.append({"role": "user", "content": query})
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": llm_response.content,
-            "tool_calls": getattr(llm_response, "tool_calls", None)
-        })
+        if record_history:
+            self.conversation_history.append({"role": "user", "content": query})
+            self.conversation_history.append({
+                "role": "assistant",
+                "content": llm_response.content,
+                "tool_calls": getattr(llm_response, "tool_calls", None)
+            })
 
         # Check if the LLM wants to use tools
         if not hasattr(llm_response, "tool_calls") or not llm_response.tool_calls:
@@ -143,11 +385,16 @@ class MCPHost:
         tool_calls = []
         for tool_call in llm_response.tool_calls:
             tool_name = tool_call.function.name
-            tool_args_str = tool_call.function.arguments
-            try:
-                tool_args = json.loads(tool_args_str)
-            except json.JSONDecodeError:
-                tool_args = {"raw_input": tool_args_str}
+            tool_args_raw = tool_call.function.arguments
+            # Newer SDKs may hand back parsed dicts already; only parse when
+            # the provider returned a JSON string
+            if isinstance(tool_args_raw, dict):
+                tool_args = tool_args_raw
+            else:
+                try:
+                    tool_args = _json_loads(tool_args_raw)
+                except ValueError:
+                    tool_args = {"raw_input": tool_args_raw}
             tool_calls.append({
                 "id": tool_call.id,
                 "name": tool_name,
@@ -163,7 +410,9 @@ class MCPHost:
 
     async def process_tool_results(self, messages: List[Dict[str, Any]],
                                   llm_response: Any,
-                                  tool_results: List[Dict[str, Any]]) -> str:
+                                  tool_results: List[Dict[str, Any]],
+                                  record_history: bool = True,
+                                  stream: Optional[bool] = None) -> str:
         """
         Process tool results and get a final answer from the LLM.
 
@@ -171,11 +420,19 @@ class MCPHost:
             messages: The conversation messages
             llm_response: The LLM's response containing tool calls
             tool_results: Results from executing the tools
+            record_history: Append the final answer to the shared
+                conversation history; pass False for concurrent batch
+                queries
+            stream: Per-call override of the host's streaming setting;
+                concurrent batch queries pass False
 
         Returns:
             The LLM's final answer after processing tool results
         """
-        updated_messages = messages.copy()
+        use_stream = self.stream if stream is None else stream
+        # The caller discards messages after this round, so append in place
+        # rather than copying the full history
+        updated_messages = messages
         updated_messages.append({
             "role": "assistant",
             "content": llm_response.content,
@@ -185,21 +442,36 @@ class MCPHost:
             updated_messages.append({
                 "role": "tool",
                 "tool_call_id": result["id"],
-                "content": json.dumps(result["result"])
+                "content": _json_dumps(result["result"])
+            })
+        cache_key = LLMCache.make_key(self.model, updated_messages, temperature=0.3)
+        final_message = self.llm_cache.get(cache_key)
+        self.last_response_streamed = final_message is None and use_stream
+        if final_message is None:
+            final_response = await self._chat_async(
+                stream=use_stream,
+                model=self.model,
+                messages=updated_messages,
+                temperature=0.3,
+                max_tokens=2000
+            )
+            final_message = final_response.choices[0].message
+            self.llm_cache.set(cache_key, final_message)
+        final_answer = final_message.content
+        if record_history:
+            self.conversation_history.append({
+                "role": "assistant",
+                "content": final_answer
             })
-        final_response = self.ai_client.chat.completions.create(
-            model=self.model,
-            messages=updated_messages,
-            temperature=0.3,
-            max_tokens=2000
-        )
-        final_answer = final_response.choices[0].message.content
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": final_answer
-        })
         return final_answer
 
+    async def aclose(self) -> None:
+        """Close the completion thread pool and the shared HTTP client."""
+        self._executor.shutdown(wait=False)
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+
     def change_model(self, new_model: str) -> None:
         """
         Change the LLM model.
@@ -208,6 +480,7 @@ class MCPHost:
             new_model: The new model to use (provider:model format)
         """
         self.model = new_model
+        self._tool_cache.clear()
         print(f"Model changed to: {new_model}")
 
 # Example usage for grid operations
@@ -0,0 +1,109 @@
+
+"""
+grid_ops_numerics.py - Numeric kernels for grid operations analytics
+
+This module holds the hot numeric loops behind the grid analytics tools
+(load-pattern statistics and related reductions). Kernels are JIT-compiled
+with Numba when it is installed and fall back to plain NumPy otherwise.
+"""
+import numpy as np
+
+# Optional JIT compilation; kernels run as plain Python/NumPy without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op decorator standing in for numba.njit."""
+        if args and callable(args[0]):
+            return args[0]
+        def decorator(func):
+            return func
+        return decorator
+
+@njit(cache=True, fastmath=True)
+def load_stats(values):
+    """
+    Compute min, max, and linear trend slope of a load series in one pass.
+
+    Args:
+        values: 1-D float64 array of load samples (MW)
+
+    Returns:
+        Tuple of (min, max, slope) where slope is the least-squares trend
+        in MW per sample
+    """
+    n = values.shape[0]
+    minimum = values[0]
+    maximum = values[0]
+    sum_y = 0.0
+    sum_xy = 0.0
+    for i in range(n):
+        v = values[i]
+        if v < minimum:
+            minimum = v
+        if v > maximum:
+            maximum = v
+        sum_y += v
+        sum_xy += i * v
+    # Least-squares slope against the 0..n-1 index
+    sum_x = n * (n - 1) / 2.0
+    sum_x2 = (n - 1) * n * (2 * n - 1) / 6.0
+    denom = n * sum_x2 - sum_x * sum_x
+    slope = 0.0
+    if denom != 0.0:
+        slope = (n * sum_xy - sum_x * sum_y) / denom
+    return minimum, maximum, slope
+
+@njit(cache=True)
+def rolling_stats(values, window):
+    """
+    Compute max, min, mean, and sample std of the rolling mean in one pass.
+
+    Maintains a running window sum plus sum and sum-of-squares trackers over
+    the window means, so the whole reduction is a single sweep with no
+    intermediate arrays.
+
+    Args:
+        values: 1-D float64 array of load samples (MW)
+        window: Rolling window length in samples (must be <= len(values))
+
+    Returns:
+        Tuple of (max, min, mean, std) over the rolling means
+    """
+    n = values.shape[0]
+    count = n - window + 1
+    window_sum = 0.0
+    for i in range(window):
+        window_sum += values[i]
+    current = window_sum / window
+    maximum = current
+    minimum = current
+    total = current
+    total_sq = current * current
+    for i in range(window, n):
+        window_sum += values[i] - values[i - window]
+        current = window_sum / window
+        if current > maximum:
+            maximum = current
+        if current < minimum:
+            minimum = current
+        total += current
+        total_sq += current * current
+    mean = total / count
+    variance = 0.0
+    if count > 1:
+        variance = (total_sq - total * total / count) / (count - 1)
+        if variance < 0.0:
+            variance = 0.0
+    return maximum, minimum, mean, np.sqrt(variance)
+
+def warmup():
+    """Trigger JIT compilation once so the first real call is not penalized."""
+    load_stats(np.zeros(2, dtype=np.float64))
+    rolling_stats(np.zeros(2, dtype=np.float64), 1)
+
+# Pre-warm at import so server startup absorbs the compile cost
+warmup()
@@ -9,12 +9,42 @@ import os
 import sys
 import json
 import asyncio
-from typing import Dict, Any, List, Optional
+import logging
+from collections import deque
+from typing import Dict, Any, Deque, List, Optional
 from dotenv import load_dotenv
 
+# Configure logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
 # Load environment variables
 load_dotenv()
 
+async def _drain_stream(stream: asyncio.StreamReader, name: str,
+                        tail: Optional[Deque[str]] = None,
+                        ready_marker: Optional[str] = None,
+                        ready_event: Optional[asyncio.Event] = None):
+    """
+    Continuously drain a subprocess stream so the server never blocks on a
+    full pipe, signalling ready_event when the startup marker is seen.
+
+    Drained lines go to debug logging and, when a tail deque is supplied,
+    into it tagged with the stream name, so callers can show the server's
+    recent output when startup fails.
+    """
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        text = line.decode().rstrip()
+        logger.debug(f"[server {name}] {text}")
+        if tail is not None:
+            tail.append(f"[{name}] {text}")
+        if ready_marker and ready_event and ready_marker in text:
+            print(f"Server startup detected: {text}")
+            ready_event.set()
+
 async def run_grid_operations_example():
     """Run a complete grid operations example using MCP"""
     print("=== Model Context Protocol (MCP) Grid Operations Example ===\n")
@@ -27,18 +57,34 @@ async def run_grid_operations_example():
         stderr=asyncio.subprocess.PIPE
     )
 
+    # Drain both pipes for the life of the server; a single readline left
+    # later writes buffering up until the server blocked on a full pipe
+    server_ready = asyncio.Event()
+    # Recent server output, kept so a failed startup can be diagnosed
+    # without rerunning with debug logging enabled
+    output_tail: Deque[str] = deque(maxlen=50)
+    drain_tasks = [
+        asyncio.create_task(_drain_stream(
+            server_process.stdout, "stdout",
+            tail=output_tail,
+            ready_marker="GridOperationsServer:STARTED",
+            ready_event=server_ready
+        )),
+        asyncio.create_task(_drain_stream(server_process.stderr, "stderr",
+                                          tail=output_tail))
+    ]
+
     # Wait for server to initialize with error handling
     try:
-        startup_line = await asyncio.wait_for(server_process.stdout.readline(), timeout=15)
-        if not startup_line:
-            raise asyncio.TimeoutError()
-        print(f"Server startup detected: {startup_line.decode().strip()}")
+        await asyncio.wait_for(server_ready.wait(), timeout=15)
     except asyncio.TimeoutError:
         print("Server failed to start within 15 seconds")
-        # Check for server errors
-        if server_process.stderr:
-            stderr_output = await server_process.stderr.read()
-            print(f"Server error output:\n{stderr_output.decode()}")
+        if output_tail:
+            print("Last server output:")
+            for entry in output_tail:
+                print(f"  {entry}")
+        for task in drain_tasks:
+            task.cancel()
         return
 
     # Step 2: Initialize the client
@@ -70,6 +116,10 @@ async def run_grid_operations_example():
                 server_process.kill()
                 await server_process.wait()
 
+        # Drain tasks finish on pipe EOF; cancel any stragglers
+        for task in drain_tasks:
+            task.cancel()
+
         print("\nGrid operations example completed successfully!")
 
 if __name__ == "__main__":
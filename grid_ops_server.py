@@ -10,12 +10,16 @@ accessing research papers, and generating visualizations.
 
 import json
 import os
-import pandas as pd
+import asyncio
+import threading
 import matplotlib
 import numpy as np
 import io
 import base64
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 from typing import List, Dict, Any, Optional, Union
 
 # Set matplotlib backend before importing pyplot
@@ -24,125 +28,277 @@ import matplotlib.pyplot as plt
 
 from mcp.server.fastmcp import FastMCP
 
+from grid_ops_numerics import rolling_stats
+
 # Initialize the MCP server
 mcp = FastMCP("Grid Operations Assistant")
 
+# Shared random generator for simulated sensor data; seeded, and consumed
+# only by the import-time _HOURLY_LOAD draw below, so render worker
+# processes re-importing this module reproduce the parent's hourly profile
+_RNG = np.random.default_rng(42)
+
 # ----- Resources -----
 
+# Static topology data hoisted to module scope so lookups don't rebuild the
+# dict (and its nested lists) on every request; MappingProxyType keeps the
+# shared structure read-only
+_TOPOLOGIES = MappingProxyType({
+    "northeast": {
+        "voltage_levels": [345, 138, 69],  # kV
+        "substations": 45,
+        "transmission_lines": 1200,  # miles
+        "primary_generators": ["Nuclear", "Hydro", "Wind"]
+    },
+    "southwest": {
+        "voltage_levels": [500, 230, 115],
+        "substations": 32,
+        "transmission_lines": 950,
+        "primary_generators": ["Solar", "Natural Gas", "Coal"]
+    }
+})
+
+# Static datasets share the same treatment. Numeric series are stored as
+# NumPy arrays so the analytics and plotting paths use them directly; the
+# resource endpoint converts to lists only when serializing over MCP.
+_PEAK_LOAD_2023 = MappingProxyType({
+    "name": "Regional Peak Load Analysis",
+    "source": "NERC",
+    "time_range": "2023",
+    "unit": "MW",
+    "data": {
+        "regions": ["Northeast", "Southeast", "Midwest", "West"],
+        "peak_loads": np.array([65000, 72000, 58000, 48000], dtype=np.int64)
+    }
+})
+
+# Simulated hourly profile drawn once at import. Drawing inside the dataset
+# getter tied the profile to whichever dataset_id was requested first (each
+# cache miss advanced the generator); at module scope the draw is
+# unconditional and deterministic
+_HOURLY_LOAD = MappingProxyType({
+    "name": "Hourly Load Profile",
+    "source": "ISO-NE",
+    "time_range": "2024-01-01 to 2024-01-07",
+    "unit": "MW",
+    "data": {
+        "hours": np.arange(24),
+        "load": _RNG.normal(15000, 2000, size=24)
+    }
+})
+
+_DATASETS = MappingProxyType({
+    "peak_load_2023": _PEAK_LOAD_2023,
+    "hourly_load": _HOURLY_LOAD
+})
+
 @mcp.resource("grid://topology/{region}")
+@lru_cache(maxsize=32)
 def get_grid_topology(region: str) -> Dict[str, Any]:
     """Retrieve power grid topology for a specific region."""
-    topologies = {
-        "northeast": {
-            "voltage_levels": [345, 138, 69],  # kV
-            "substations": 45,
-            "transmission_lines": 1200,  # miles
-            "primary_generators": ["Nuclear", "Hydro", "Wind"]
-        },
-        "southwest": {
-            "voltage_levels": [500, 230, 115],
-            "substations": 32,
-            "transmission_lines": 950,
-            "primary_generators": ["Solar", "Natural Gas", "Coal"]
-        }
-    }
-    return topologies.get(region.lower(), {"error": f"Topology for {region} not found"})
+    topology = _TOPOLOGIES.get(region.lower())
+    if topology is None:
+        return {"error": f"Topology for {region} not found"}
+    return topology
+
+def _get_dataset(dataset_id: str) -> Dict[str, Any]:
+    """
+    Fetch the array-backed dataset for in-process analytics and plotting.
+
+    Datasets are module-level constants fixed at import time, so callers
+    must treat the returned structure as read-only.
+    """
+    dataset = _DATASETS.get(dataset_id)
+    if dataset is None:
+        return {"error": f"Dataset {dataset_id} not found"}
+    return dataset
 
 @mcp.resource("grid://load/{dataset_id}")
+@lru_cache(maxsize=32)
 def get_grid_load_data(dataset_id: str) -> Dict[str, Any]:
-    """Retrieve grid load dataset by ID."""
-    datasets = {
-        "peak_load_2023": {
-            "name": "Regional Peak Load Analysis",
-            "source": "NERC",
-            "time_range": "2023",
-            "unit": "MW",
-            "data": {
-                "regions": ["Northeast", "Southeast", "Midwest", "West"],
-                "peak_loads": [65000, 72000, 58000, 48000]
-            }
-        },
-        "hourly_load": {
-            "name": "Hourly Load Profile",
-            "source": "ISO-NE",
-            "time_range": "2024-01-01 to 2024-01-07",
-            "unit": "MW",
-            "data": {
-                "hours": list(range(24)),
-                "load": [np.random.normal(15000, 2000) for _ in range(24)]
-            }
-        }
+    """Retrieve grid load dataset by ID, with series as JSON-safe lists."""
+    dataset = _get_dataset(dataset_id)
+    if "error" in dataset:
+        return dataset
+    json_safe = dict(dataset)
+    json_safe["data"] = {
+        key: value.tolist() if isinstance(value, np.ndarray) else value
+        for key, value in dataset["data"].items()
     }
-    return datasets.get(dataset_id, {"error": f"Dataset {dataset_id} not found"})
+    return json_safe
 
 # ----- Tools -----
 
 @mcp.tool()
-def analyze_load_pattern(dataset_id: str, window_hours: int = 24) -> Dict[str, Any]:
+async def analyze_load_pattern(dataset_id: str, window_hours: int = 24) -> Dict[str, Any]:
     """Analyze load patterns in grid data."""
-    data = get_grid_load_data(dataset_id)
-    
+    data = _get_dataset(dataset_id)
+
     if "error" in data:
         return data
-    
-    df = pd.DataFrame(data["data"])
-    df['load'] = df['load'].rolling(window=window_hours).mean()
-    
+
+    # Datasets like peak_load_2023 carry no hourly series; fail cleanly
+    # instead of raising KeyError
+    loads = data["data"].get("load")
+    if loads is None:
+        return {"error": f"Dataset {dataset_id} has no 'load' series"}
+    arr = np.ascontiguousarray(loads, dtype=np.float64)
+    # Reject non-positive windows too: the njit kernel has no bounds
+    # checking, so a negative window would read past the array instead of
+    # raising
+    if not 1 <= window_hours <= arr.shape[0]:
+        return {"error": f"window_hours must be between 1 and {arr.shape[0]}, got {window_hours}"}
+    # Single-pass fused kernel (JIT-compiled when Numba is available)
+    max_load, min_load, avg_load, std = rolling_stats(arr, window_hours)
+    # One vectorized rounding call instead of three scalar round() coercions
+    max_load, min_load, avg_load = np.round([max_load, min_load, avg_load], 2).tolist()
+
     return {
         "dataset": data["name"],
         "analysis_window": f"{window_hours}h",
-        "max_load": round(df['load'].max(), 2),
-        "min_load": round(df['load'].min(), 2),
-        "avg_load": round(df['load'].mean(), 2),
-        "trend": "stable" if df['load'].std() < 1000 else "volatile"
+        "max_load": max_load,
+        "min_load": min_load,
+        "avg_load": avg_load,
+        "trend": "stable" if std < 1000 else "volatile"
     }
 
+# Simulated risk model constants: per-factor coefficients, category
+# thresholds, and labels indexed by searchsorted bucket
+_RISK_BASE = 0.05
+_RISK_KEYS = ("temperature", "wind_speed", "precipitation")
+_RISK_COEF = np.array([0.001, 0.002, 0.003])
+_RISK_BUCKETS = np.array([0.05, 0.1])
+_RISK_LABELS = ("low", "medium", "high")
+
+def _weather_vector(weather_data: Dict[str, float]) -> np.ndarray:
+    """Build the (temp delta, wind, precipitation) vector for the risk model."""
+    return np.array([
+        abs(weather_data.get("temp_c", 25) - 25),
+        weather_data.get("wind_kph", 0),
+        weather_data.get("precip_mm", 0)
+    ], dtype=np.float64)
+
 @mcp.tool()
-def predict_outage_risk(equipment_id: str, weather_data: Dict[str, float]) -> Dict[str, Any]:
+async def predict_outage_risk(equipment_id: str, weather_data: Dict[str, float],
+                              include_factors: bool = True) -> Dict[str, Any]:
     """Predict outage risk for grid equipment based on weather conditions."""
-    # Simulated risk model
-    base_risk = 0.05
-    risk_factors = {
-        "temperature": 0.001 * abs(weather_data.get("temp_c", 25) - 25),
-        "wind_speed": 0.002 * weather_data.get("wind_kph", 0),
-        "precipitation": 0.003 * weather_data.get("precip_mm", 0)
-    }
-    
-    total_risk = base_risk + sum(risk_factors.values())
-    
-    return {
+    # Simulated risk model: one dot product plus a branchless bucket lookup
+    # instead of per-factor arithmetic and a nested ternary
+    vec = _weather_vector(weather_data)
+    total_risk = _RISK_BASE + float(_RISK_COEF @ vec)
+
+    result = {
         "equipment_id": equipment_id,
         "risk_score": round(total_risk, 4),
-        "risk_category": "high" if total_risk > 0.1 else "medium" if total_risk > 0.05 else "low",
-        "factors": risk_factors
+        "risk_category": _RISK_LABELS[int(np.searchsorted(_RISK_BUCKETS, total_risk))]
     }
+    if include_factors:
+        result["factors"] = dict(zip(_RISK_KEYS, (_RISK_COEF * vec).tolist()))
+    return result
 
 @mcp.tool()
-def generate_grid_visualization(dataset_id: str) -> Dict[str, Any]:
+async def predict_outage_risks_batch(equipment_ids: List[str],
+                                     weather_data: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+    """Predict outage risk for a fleet of equipment in one vectorized pass."""
+    if len(equipment_ids) != len(weather_data):
+        return [{"error": "equipment_ids and weather_data must have the same length"}]
+    # np.stack rejects an empty sequence, so an empty fleet short-circuits
+    if not equipment_ids:
+        return []
+
+    # Stack per-equipment weather into one matrix so scoring the whole
+    # fleet is a single matrix-vector product
+    deltas = np.stack([_weather_vector(weather) for weather in weather_data])
+    scores = _RISK_BASE + deltas @ _RISK_COEF
+    categories = np.searchsorted(_RISK_BUCKETS, scores)
+
+    return [
+        {
+            "equipment_id": equipment_id,
+            "risk_score": round(float(score), 4),
+            "risk_category": _RISK_LABELS[int(category)]
+        }
+        for equipment_id, score, category in zip(equipment_ids, scores, categories)
+    ]
+
+# One Figure reused across renders; creating a fresh one per call pays Agg
+# setup, font-cache lookups, and artist allocation every time. Matplotlib
+# state is not thread-safe, so renders are serialized with a lock.
+_FIG, _AX = plt.subplots(figsize=(10, 6))
+_VIZ_LOCK = threading.Lock()
+# Reused PNG buffer; rewound and truncated per render under the same lock
+_BUF = io.BytesIO()
+
+@lru_cache(maxsize=16)
+def _render_png_b64(dataset_id: str) -> str:
+    """
+    Render a dataset to a base64 PNG, memoized per dataset.
+
+    Datasets are fixed for the life of the process (the resource getters are
+    themselves cached), so repeat visualization requests reuse the encoded
+    PNG instead of re-running the matplotlib pipeline. The array-backed
+    dataset goes straight to matplotlib with no list-to-array coercion.
+    """
+    data = _get_dataset(dataset_id)
+
+    with _VIZ_LOCK:
+        _AX.clear()
+
+        if "hours" in data["data"]:
+            _AX.plot(data["data"]["hours"], data["data"]["load"], 'b-', linewidth=2)
+            _AX.set_title("Hourly Load Profile")
+            _AX.set_xlabel("Hour of Day")
+            _AX.set_ylabel("Load (MW)")
+        elif "regions" in data["data"]:
+            _AX.bar(data["data"]["regions"], data["data"]["peak_loads"])
+            _AX.set_title("Regional Peak Loads")
+            _AX.set_ylabel("Peak Load (MW)")
+
+        _AX.grid(True, linestyle='--', alpha=0.7)
+
+        _BUF.seek(0)
+        _BUF.truncate()
+        # Encode through the Agg canvas directly at low deflate level; the
+        # payload is base64-inflated over stdio anyway, so trading a few KB
+        # for a much faster encode is a win (figure dpi is the default 100)
+        _FIG.canvas.print_png(_BUF, pil_kwargs={'compress_level': 1})
+        # getvalue() avoids the seek + read copy of the PNG bytes
+        png = _BUF.getvalue()
+
+    return base64.b64encode(png).decode('ascii')
+
+# CPU-heavy renders run in worker processes so the server's event loop can
+# keep dispatching other tool calls. The pool is created lazily to avoid
+# spawning nested pools when workers import this module.
+_PROC_POOL: Optional[ProcessPoolExecutor] = None
+_PROC_POOL_WORKERS = 4
+
+def _get_proc_pool() -> ProcessPoolExecutor:
+    global _PROC_POOL
+    if _PROC_POOL is None:
+        _PROC_POOL = ProcessPoolExecutor(max_workers=_PROC_POOL_WORKERS)
+    return _PROC_POOL
+
+# Parent-side cache of finished renders; the lru_cache on _render_png_b64
+# only helps within each worker process
+_B64_CACHE: Dict[str, str] = {}
+
+@mcp.tool()
+async def generate_grid_visualization(dataset_id: str) -> Dict[str, Any]:
     """Generate visualization of grid operational data."""
-    data = get_grid_load_data(dataset_id)
-    
-    plt.figure(figsize=(10, 6))
-    
-    if "hours" in data["data"]:
-        plt.plot(data["data"]["hours"], data["data"]["load"], 'b-', linewidth=2)
-        plt.title("Hourly Load Profile")
-        plt.xlabel("Hour of Day")
-        plt.ylabel("Load (MW)")
-    elif "regions" in data["data"]:
-        plt.bar(data["data"]["regions"], data["data"]["peak_loads"])
-        plt.title("Regional Peak Loads")
-        plt.ylabel("Peak Load (MW)")
-    
-    plt.grid(True, linestyle='--', alpha=0.7)
-    
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', dpi=100)
-    buf.seek(0)
-    plt.close()
-    
+    data = _get_dataset(dataset_id)
+
+    if "error" in data:
+        return data
+
+    b64 = _B64_CACHE.get(dataset_id)
+    if b64 is None:
+        loop = asyncio.get_running_loop()
+        b64 = await loop.run_in_executor(_get_proc_pool(), _render_png_b64, dataset_id)
+        _B64_CACHE[dataset_id] = b64
+
     return {
-        "visualization": f"data:image/png;base64,{base64.b64encode(buf.read()).decode('utf-8')}",
+        "visualization": f"data:image/png;base64,{b64}",
         "dataset": data["name"]
     }
 
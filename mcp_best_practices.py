@@ -7,11 +7,34 @@ for implementing MCP in grid operations applications.
 """
 import os
 import json
+import time
 import logging
+import textwrap
 from typing import Dict, Any, List, Optional, Union
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime
 
+# Optional fast JSON for response encoding; falls back to stdlib json.
+# orjson also serializes datetime and NumPy scalars natively.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Timestamp cache with one-second resolution: tool results are stamped on
+# every call, and re-formatting the same second repeatedly is wasted work
+# at high tool-call rates
+_TS_CACHE = [0, ""]
+
+def _now_iso() -> str:
+    """Return the current ISO timestamp, cached at second resolution."""
+    now = int(time.time())
+    if now != _TS_CACHE[0]:
+        _TS_CACHE[0] = now
+        _TS_CACHE[1] = datetime.fromtimestamp(now).isoformat()
+    return _TS_CACHE[1]
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -19,6 +42,47 @@ logging.basicConfig(
 )
 logger = logging.getLogger("mcp-grid")
 
+# JSON-schema type names mapped to isinstance targets and error labels
+_SCHEMA_TYPE_CHECKS = {
+    "string": (str, "a string"),
+    "integer": (int, "an integer"),
+    "number": ((int, float), "a number"),
+    "boolean": (bool, "a boolean"),
+    "array": (list, "an array"),
+    "object": (dict, "an object")
+}
+
+@dataclass(frozen=True)
+class CompiledSchema:
+    """A schema precompiled into required names and flat isinstance checks"""
+    required: tuple
+    checks: tuple
+
+# Compiled schemas cached by schema object identity. Each entry pins the
+# schema dict it was compiled from: ids are reused after garbage collection,
+# so a hit is only valid if the keyed object is still the same schema.
+_COMPILED_SCHEMAS: Dict[int, tuple] = {}
+_COMPILED_SCHEMAS_MAX = 128
+
+# Shared system prompt, dedented once at import; every MCPConfig instance
+# references the same string, with none of the source indentation baked in
+_SYSTEM_PROMPT = textwrap.dedent("""
+    You are a Grid Operations Assistant, an AI specialized in power grid management,
+    outage response, maintenance scheduling, and operational analytics.
+    You have access to grid topology, sensor data, maintenance logs, and operational tools
+    through the Model Context Protocol.
+
+    When answering questions:
+    1. Use available tools to access up-to-date grid data and operational records.
+    2. Provide evidence-based responses with references to grid events or logs where possible.
+    3. Acknowledge operational uncertainty when appropriate.
+    4. Consider multiple perspectives on grid reliability and restoration strategies.
+    5. Explain complex grid concepts clearly for operators and engineers.
+
+    Your goal is to help grid operators and engineers maintain reliability, optimize performance,
+    and restore power efficiently through rigorous operational analysis.
+    """).strip()
+
 # Configuration options
 @dataclass
 class MCPConfig:
@@ -37,175 +101,203 @@ class MCPConfig:
     retry_delay_seconds: int = 2
 
     # Host configuration
-    system_prompt_template: str = """
-    You are a Grid Operations Assistant, an AI specialized in power grid management, 
-    outage response, maintenance scheduling, and operational analytics. 
-    You have access to grid topology, sensor data, maintenance logs, and operational tools 
-    through the Model Context Protocol.
-
-    When answering questions:
-    1. Use available tools to access up-to-date grid data and operational records.
-    2. Provide evidence-based responses with references to grid events or logs where possible.
-    3. Acknowledge operational uncertainty when appropriate.
-    4. Consider multiple perspectives on grid reliability and restoration strategies.
-    5. Explain complex grid concepts clearly for operators and engineers.
-
-    Your goal is to help grid operators and engineers maintain reliability, optimize performance, 
-    and restore power efficiently through rigorous operational analysis.
-    """
+    system_prompt_template: str = _SYSTEM_PROMPT
     temperature: float = 0.3  # Lower temperature for operational tasks
     max_tokens: int = 2000
 
     # Security configuration
     enable_authentication: bool = False
     api_key_header: str = "X-API-Key"
-    allowed_origins: List[str] = None  # For CORS in HTTP/SSE transport
+    # For CORS in HTTP/SSE transport
+    allowed_origins: List[str] = field(
+        default_factory=lambda: ["http://localhost:3000", "https://example.com"]
+    )
 
     # Performance configuration
     enable_caching: bool = True
     cache_ttl_seconds: int = 3600  # 1 hour
     max_concurrent_requests: int = 10
 
-    def __post_init__(self):
-        """Initialize default values for None fields"""
-        if self.allowed_origins is None:
-            self.allowed_origins = ["http://localhost:3000", "https://example.com"]
+# Guideline text is constant; frozen module-level tuples let the accessor
+# methods return a shared object instead of rebuilding a list per call
+_TOOL_DESIGN_GUIDELINES = (
+    "Use descriptive, action-oriented tool names (e.g., 'analyze_outage_pattern', not 'outage_tool')",
+    "Provide detailed descriptions for each tool to clarify operational use",
+    "Design tools to be modular and composable for complex grid workflows",
+    "Include input validation in tool implementations to handle edge cases",
+    "Return structured data from tools for easier AI processing",
+    "Include confidence levels or uncertainty estimates in analytics results",
+    "Design tools at the right granularity for operational tasks",
+    "Ensure tool parameters are well-described and typed",
+    "Consider computational cost and optimize for real-time performance",
+    "Include references to grid logs or events in tool results where applicable"
+)
+
+_PROMPT_DESIGN_GUIDELINES = (
+    "Be specific about the operational question or scenario",
+    "Provide context about grid topology, status, or recent events",
+    "Specify the desired format and level of detail in the response",
+    "Encourage critical thinking and evaluation of operational evidence",
+    "Ask for multiple restoration or optimization strategies where appropriate",
+    "Request uncertainty estimates or confidence levels",
+    "Specify the intended audience (e.g., dispatcher, engineer)",
+    "Break complex grid scenarios into manageable steps",
+    "Include relevant background (e.g., weather, maintenance windows)",
+    "Encourage use of specific tools for grid analytics"
+)
+
+_SECURITY_BEST_PRACTICES = (
+    "Implement authentication and authorization for production deployments",
+    "Validate and sanitize all inputs to prevent injection attacks",
+    "Implement rate limiting to prevent abuse",
+    "Use HTTPS for all communications in production",
+    "Limit tool capabilities to only what is necessary",
+    "Implement error handling that doesn't leak sensitive info",
+    "Regularly update dependencies to address vulnerabilities",
+    "Log access and operations for audit purposes",
+    "Implement proper secrets management for API keys",
+    "Consider privacy and critical infrastructure protection"
+)
+
+_PERFORMANCE_OPTIMIZATION_TIPS = (
+    "Cache frequently accessed grid data",
+    "Use asynchronous processing for long-running analytics",
+    "Batch related operations where possible",
+    "Optimize queries for grid event logs and sensor data",
+    "Implement pagination for large datasets",
+    "Use connection pooling for database/API connections",
+    "Scale horizontally for high-load scenarios",
+    "Implement timeouts for external API calls",
+    "Use efficient data structures for real-time processing",
+    "Profile and optimize bottlenecks in the implementation"
+)
+
+_ERROR_HANDLING_STRATEGIES = (
+    "Implement graceful degradation when components fail",
+    "Provide meaningful error messages for diagnosis",
+    "Implement retry mechanisms with exponential backoff",
+    "Log detailed error info for debugging",
+    "Handle edge cases and unexpected inputs",
+    "Implement circuit breakers for external dependencies",
+    "Provide fallback mechanisms for critical operations",
+    "Validate inputs early to catch errors before processing",
+    "Use structured error responses with error codes/messages",
+    "Implement global error handling for unhandled exceptions"
+)
 
 # Best practices for grid operations
 class MCPBestPractices:
     """Best practices for MCP implementation in grid operations"""
 
     @staticmethod
-    def tool_design_guidelines() -> List[str]:
+    def tool_design_guidelines() -> tuple:
         """Guidelines for designing effective MCP tools for grid ops"""
-        return [
-            "Use descriptive, action-oriented tool names (e.g., 'analyze_outage_pattern', not 'outage_tool')",
-            "Provide detailed descriptions for each tool to clarify operational use",
-            "Design tools to be modular and composable for complex grid workflows",
-            "Include input validation in tool implementations to handle edge cases",
-            "Return structured data from tools for easier AI processing",
-            "Include confidence levels or uncertainty estimates in analytics results",
-            "Design tools at the right granularity for operational tasks",
-            "Ensure tool parameters are well-described and typed",
-            "Consider computational cost and optimize for real-time performance",
-            "Include references to grid logs or events in tool results where applicable"
-        ]
+        return _TOOL_DESIGN_GUIDELINES
 
     @staticmethod
-    def prompt_design_guidelines() -> List[str]:
+    def prompt_design_guidelines() -> tuple:
         """Guidelines for designing effective prompts for grid operations"""
-        return [
-            "Be specific about the operational question or scenario",
-            "Provide context about grid topology, status, or recent events",
-            "Specify the desired format and level of detail in the response",
-            "Encourage critical thinking and evaluation of operational evidence",
-            "Ask for multiple restoration or optimization strategies where appropriate",
-            "Request uncertainty estimates or confidence levels",
-            "Specify the intended audience (e.g., dispatcher, engineer)",
-            "Break complex grid scenarios into manageable steps",
-            "Include relevant background (e.g., weather, maintenance windows)",
-            "Encourage use of specific tools for grid analytics"
-        ]
+        return _PROMPT_DESIGN_GUIDELINES
 
     @staticmethod
-    def security_best_practices() -> List[str]:
+    def security_best_practices() -> tuple:
         """Security best practices for MCP in grid ops"""
-        return [
-            "Implement authentication and authorization for production deployments",
-            "Validate and sanitize all inputs to prevent injection attacks",
-            "Implement rate limiting to prevent abuse",
-            "Use HTTPS for all communications in production",
-            "Limit tool capabilities to only what is necessary",
-            "Implement error handling that doesn't leak sensitive info",
-            "Regularly update dependencies to address vulnerabilities",
-            "Log access and operations for audit purposes",
-            "Implement proper secrets management for API keys",
-            "Consider privacy and critical infrastructure protection"
-        ]
+        return _SECURITY_BEST_PRACTICES
 
     @staticmethod
-    def performance_optimization_tips() -> List[str]:
+    def performance_optimization_tips() -> tuple:
         """Performance optimization tips for grid ops"""
-        return [
-            "Cache frequently accessed grid data",
-            "Use asynchronous processing for long-running analytics",
-            "Batch related operations where possible",
-            "Optimize queries for grid event logs and sensor data",
-            "Implement pagination for large datasets",
-            "Use connection pooling for database/API connections",
-            "Scale horizontally for high-load scenarios",
-            "Implement timeouts for external API calls",
-            "Use efficient data structures for real-time processing",
-            "Profile and optimize bottlenecks in the implementation"
-        ]
+        return _PERFORMANCE_OPTIMIZATION_TIPS
 
     @staticmethod
-    def error_handling_strategies() -> List[str]:
+    def error_handling_strategies() -> tuple:
         """Robust error handling strategies for grid ops"""
-        return [
-            "Implement graceful degradation when components fail",
-            "Provide meaningful error messages for diagnosis",
-            "Implement retry mechanisms with exponential backoff",
-            "Log detailed error info for debugging",
-            "Handle edge cases and unexpected inputs",
-            "Implement circuit breakers for external dependencies",
-            "Provide fallback mechanisms for critical operations",
-            "Validate inputs early to catch errors before processing",
-            "Use structured error responses with error codes/messages",
-            "Implement global error handling for unhandled exceptions"
-        ]
+        return _ERROR_HANDLING_STRATEGIES
 
 # Utility functions for grid ops
 class MCPUtils:
     """Utility functions for MCP implementation in grid operations"""
 
+    @staticmethod
+    def dumps(obj: Any) -> str:
+        """
+        Serialize an MCP response payload to JSON.
+
+        Uses orjson when installed (C encoder, native datetime/NumPy
+        support); stdlib json otherwise.
+        """
+        if orjson is not None:
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY, default=str).decode()
+        return json.dumps(obj, default=str)
+
     @staticmethod
     def format_tool_result(result: Any, tool_name: str) -> Dict[str, Any]:
         """
         Format a tool result for consistent presentation.
         """
         if isinstance(result, str):
-            try:
-                result_dict = json.loads(result)
-            except json.JSONDecodeError:
+            # Only attempt a parse when the string can actually be a JSON
+            # container; plain strings would otherwise pay for the parser
+            # startup plus the exception on every call
+            if result.lstrip()[:1] in ('{', '['):
+                try:
+                    result_dict = json.loads(result)
+                except json.JSONDecodeError:
+                    result_dict = {"raw_result": result}
+            else:
                 result_dict = {"raw_result": result}
         else:
             result_dict = result
 
         return {
             "tool": tool_name,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _now_iso(),
             "result": result_dict
         }
 
+    @staticmethod
+    def compile_schema(schema: Dict[str, Any]) -> "CompiledSchema":
+        """
+        Precompile a JSON schema into direct isinstance checks.
+        """
+        checks = []
+        for prop, prop_schema in schema.get("properties", {}).items():
+            type_check = _SCHEMA_TYPE_CHECKS.get(prop_schema.get("type"))
+            if type_check is not None:
+                expected, label = type_check
+                checks.append((prop, expected, f"Property {prop} should be {label}"))
+        return CompiledSchema(
+            required=tuple(schema.get("required", [])),
+            checks=tuple(checks)
+        )
+
     @staticmethod
     def validate_tool_args(args: Dict[str, Any], schema: Dict[str, Any]) -> List[str]:
         """
         Validate tool arguments against a schema.
+
+        Schemas are compiled once and cached, so repeated validations walk a
+        flat tuple of isinstance checks instead of re-dispatching on the
+        schema dict for every call.
         """
-        errors = []
-        required = schema.get("required", [])
-        for prop in required:
-            if prop not in args:
-                errors.append(f"Missing required property: {prop}")
-
-        properties = schema.get("properties", {})
-        for prop, value in args.items():
-            if prop in properties:
-                prop_schema = properties[prop]
-                prop_type = prop_schema.get("type")
-                if prop_type == "string" and not isinstance(value, str):
-                    errors.append(f"Property {prop} should be a string")
-                elif prop_type == "integer" and not isinstance(value, int):
-                    errors.append(f"Property {prop} should be an integer")
-                elif prop_type == "number" and not isinstance(value, (int, float)):
-                    errors.append(f"Property {prop} should be a number")
-                elif prop_type == "boolean" and not isinstance(value, bool):
-                    errors.append(f"Property {prop} should be a boolean")
-                elif prop_type == "array" and not isinstance(value, list):
-                    errors.append(f"Property {prop} should be an array")
-                elif prop_type == "object" and not isinstance(value, dict):
-                    errors.append(f"Property {prop} should be an object")
+        entry = _COMPILED_SCHEMAS.get(id(schema))
+        if entry is not None and entry[0] is schema:
+            compiled = entry[1]
+        else:
+            compiled = MCPUtils.compile_schema(schema)
+            if len(_COMPILED_SCHEMAS) >= _COMPILED_SCHEMAS_MAX:
+                _COMPILED_SCHEMAS.clear()
+            _COMPILED_SCHEMAS[id(schema)] = (schema, compiled)
+
+        errors = [
+            f"Missing required property: {prop}"
+            for prop in compiled.required if prop not in args
+        ]
+        errors.extend(
+            message
+            for prop, expected, message in compiled.checks
+            if prop in args and not isinstance(args[prop], expected)
+        )
         return errors
 
     @staticmethod
@@ -217,7 +309,7 @@ class MCPUtils:
             "error": {
                 "code": error_code,
                 "message": error_message,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": _now_iso()
             }
         }
 
@@ -225,10 +317,49 @@ class MCPUtils:
     def truncate_conversation_history(history: List[Dict[str, Any]], max_length: int = 10) -> List[Dict[str, Any]]:
         """
         Truncate conversation history to prevent it from growing too large.
+
+        For list-backed histories this still copies on truncation; callers
+        that append frequently should hold a ConversationHistory instead,
+        where the bound is enforced by the deque with no copying.
         """
         if len(history) <= max_length:
             return history
-        return [history[0]] + history[-(max_length-1):]
+        return history[:1] + history[-(max_length - 1):]
+
+class ConversationHistory:
+    """
+    Bounded conversation history with an optionally pinned system message.
+
+    Appends are O(1): the tail lives in a deque with maxlen, so old messages
+    fall off automatically instead of being sliced away on every truncation.
+    """
+
+    def __init__(self, max_length: int = 10):
+        """
+        Initialize the history.
+
+        Args:
+            max_length: Maximum number of messages kept (including the
+                pinned system message, if any)
+        """
+        self.system: Optional[Dict[str, Any]] = None
+        self.tail: deque = deque(maxlen=max_length - 1)
+
+    def append(self, message: Dict[str, Any]) -> None:
+        """Append a message; the first system message is pinned in place."""
+        if message.get("role") == "system" and self.system is None:
+            self.system = message
+            return
+        self.tail.append(message)
+
+    def as_list(self) -> List[Dict[str, Any]]:
+        """Materialize the history as a message list for serialization."""
+        if self.system is not None:
+            return [self.system, *self.tail]
+        return list(self.tail)
+
+    def __len__(self) -> int:
+        return len(self.tail) + (1 if self.system is not None else 0)
 
 # Example usage
 if __name__ == "__main__":
@@ -249,7 +380,7 @@ if __name__ == "__main__":
     print("\nTesting Utility Functions:")
     result = {"load_increase": "150MW", "confidence": "high"}
     formatted = MCPUtils.format_tool_result(result, "analyze_load_pattern")
-    print(f"Formatted Tool Result: {json.dumps(formatted, indent=2)}")
+    print(f"Formatted Tool Result: {MCPUtils.dumps(formatted)}")
 
     args = {"substation_id": "S123", "start_time": "2024-01-01T00:00:00Z", "end_time": "2024-01-02T00:00:00Z"}
     schema = {